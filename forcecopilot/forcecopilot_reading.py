@@ -1,6 +1,9 @@
 import socket
 import time
 
+# Time to wait (s) for the rest of a reply once it has started
+_REPLY_GAP = 0.1
+
 
 class TestIO:
 
@@ -8,42 +11,126 @@ class TestIO:
         # self.ipAddress = "10.20.8.136"
         self.ipAddress = "10.20.0.194"
         self.port = 63350
+        # Time to wait (s) for the server to connect and to reply
+        self.timeout = 2.0
+        # Cached connection to the server, opened on the first query
+        self._sock = None
+        # Buffer reused by each read of the socket
+        self._buf = bytearray(1024)
+        self._view = memoryview(self._buf)
+        # Data received after the end of the last reply
+        self._pending = bytearray()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _ensure_connected(self):
+        """
+        Private method that opens the TCP socket with the robot on the port
+        63 350 if it is not already opened.
+        """
+        if self._sock is not None:
+            return
+
+        # Create the socket
+        tcpSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        tcpSocket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        tcpSocket.settimeout(self.timeout)
+        # Connect to the server
+        tcpSocket.connect((self.ipAddress, self.port))
+        self._sock = tcpSocket
+
+    def close(self):
+        """
+        Close the connection with the server, if any.
+        """
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        # The rest of a reply can't be received anymore
+        self._pending = bytearray()
+
+    def _read_reply(self):
+        """
+        Private method that reads a reply of the server. The protocol does
+        not guarantee that a reply ends with a new line, so a reply ends at
+        the first new line, when the server closes the connection, or when
+        nothing more is received for _REPLY_GAP seconds once the reply has
+        started. The data received after a new line is kept for the next
+        reply.
+
+        Returns:
+            reply (Bytes): The reply (with its new line, if any).
+        """
+        reply = self._pending
+        self._pending = bytearray()
+        end = reply.find(b"\n") + 1
+        while not end:
+            try:
+                # Wait for the reply, then only briefly for the rest of it
+                self._sock.settimeout(_REPLY_GAP if reply else self.timeout)
+                size = self._sock.recv_into(self._buf)
+            except socket.timeout:
+                # Nothing more came, the reply is what was received
+                if reply:
+                    return bytes(reply)
+                raise
+            # An empty read means the server closed the connection, after
+            # the reply if there is one
+            if size == 0:
+                self.close()
+                if reply:
+                    return bytes(reply)
+                raise ConnectionResetError("Connection closed by server")
+            if not reply:
+                end = self._buf.find(b"\n", 0, size) + 1
+                # Most replies come in a single read
+                if end == size:
+                    return bytes(self._view[:size])
+            start = len(reply)
+            reply += self._view[:size]
+            end = reply.find(b"\n", start) + 1
+        self._pending = reply[end:]
+        return bytes(reply[:end])
 
     def queryServer(self, query):
         """
         Private method that sends a command and returns the server's response
         in a readable fashion
 
-        1- Creates a TCP socket with the robot on the port 63 350.
+        1- Connect to the robot on the port 63 350 (the socket is kept opened
+           between queries).
         2- Encode and execute the given query.
-        3- Store the result
-        4- Close the socket
+        3- Read the result (see _read_reply)
+        4- If the connection was lost, reconnect and retry once.
         5- Return the server's answer.
 
         Args:
-            query (String): Query to send to the server.
+            query (String or Bytes): Query to send to the server.
 
         Returns:
 
         """
-        # Create the socket
-        tcpSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        # Connect to the server
-        tcpSocket.connect((self.ipAddress, self.port))
-
-        # Run the query
-        tcpSocket.sendall(query.encode())
+        if isinstance(query, str):
+            query = query.encode("utf-8")
 
-        try:
-            # Receive the result
-            data = tcpSocket.recv(1024)
-        except Exception as e:
-            print(str(e))
-        finally:
-            tcpSocket.close()
+        for attempt in range(2):
+            try:
+                self._ensure_connected()
+                # Run the query
+                self._sock.sendall(query)
+                # Receive the result and return it
+                return self._read_reply()
+            except socket.error as e:
+                # Drop the broken socket, a new one is opened on retry
+                self.close()
+                if attempt:
+                    print(str(e))
 
-        # Return the formatted value
-        return data
+        return b""
 
 
 if __name__ == '__main__':
@@ -55,12 +142,12 @@ if __name__ == '__main__':
     """
 
     test = TestIO()
-    # cmd = "READ UR DATA" + "\n"
-    cmd = "READ DATA" + "\n"
-    cmd.encode('utf-8')
-    # cmd = "CURRENT STATE"
+    # cmd = b"READ UR DATA\n"
+    cmd = b"READ DATA\n"
+    # cmd = b"CURRENT STATE"
     print(str(test.queryServer(cmd)))
     #
     # while True:
     #     print(str(test.queryServer(cmd)))
     #     time.sleep(1)
+    test.close()
@@ -1,22 +1,29 @@
-from enum import Enum
+from enum import IntEnum
 
 
-class COLOR(Enum):
+class COLOR(IntEnum):
     """
     Great Enum test
 
     """
-    BLUE = "#0000FF"
-    GREEN = "#00FF00"
-    RED = "#FF0000"
+    BLUE = 0x0000FF
+    GREEN = 0x00FF00
+    RED = 0xFF0000
+
+    def to_hex(self):
+        """
+        Hex string of the color
+        :return: the color formatted as "#RRGGBB"
+        """
+        return f"#{self.value:06X}"
 
 class Test:
     """
     This is a Test of Test
     """
     def call_me(self, color_enum):
-        print(f"COLOR is {color_enum}")
-        print(f"COLOR value is {color_enum.value}")
+        print(f"COLOR is {color_enum!r}")
+        print(f"COLOR value is {color_enum.to_hex()}")
         print(f"COLOR name is {color_enum.name}")
 
 if __name__ == '__main__':
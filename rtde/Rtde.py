@@ -30,7 +30,7 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 from __future__ import absolute_import, division, print_function
 
 import logging
-import select
+import selectors
 import socket
 import struct
 import sys
@@ -41,6 +41,174 @@ from common import CREDENTIALS_DICTIONNARY
 LOGNAME = "rtde"
 _log = logging.getLogger(LOGNAME)
 
+# Pre-compiled structures used to frame the messages sent to the server
+_PROTO_VER = struct.Struct(">H")
+_DOUBLE = struct.Struct(">d")
+
+# Number of consumed bytes after which the receive buffer is compacted
+_BUF_COMPACT_SIZE = 65536
+# Size of the buffer used to read the socket
+_RECV_SIZE = 65536
+# Time (ms) sent data may stay unacknowledged before the connection is
+# dropped (Linux only), well above the ACK delays of a busy controller
+_USER_TIMEOUT_MS = 10000
+
+
+def pack_message(message, source, data_type):
+    """
+    Pack a text message: length and content of the message, length and
+    content of the source, then the type of the message.
+
+    Args:
+        message (String): Text message to pack.
+        source (String): Source of the message.
+        data_type (Serialize.Message.type): Type of the message.
+
+    Returns:
+        (bytearray): The packed message.
+    """
+    if isinstance(message, str):
+        message = message.encode("utf-8")
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    messageLength = len(message)
+    sourceLength = len(source)
+
+    buf = bytearray(3 + messageLength + sourceLength)
+    buf[0] = messageLength
+    buf[1 : 1 + messageLength] = message
+    buf[1 + messageLength] = sourceLength
+    buf[2 + messageLength : 2 + messageLength + sourceLength] = source
+    buf[-1] = data_type
+    return buf
+
+
+def pack_packet(command, payload=b""):
+    """
+    Pack a packet: the header (size and command), then the payload.
+
+    Args:
+        command (Int): Command of the packet.
+        payload (Bytes): Payload of the packet.
+
+    Returns:
+        (bytearray): The packed packet.
+    """
+    header = Serialize.HEADER
+    size = header.size + len(payload)
+    buf = bytearray(size)
+    header.pack_into(buf, 0, size, command)
+    buf[header.size :] = payload
+    return buf
+
+
+def pack_protocol_version(version):
+    """
+    Pack the payload of a protocol version request.
+
+    Args:
+        version (Int): Requested protocol version.
+
+    Returns:
+        (Bytes): The packed payload.
+    """
+    return _PROTO_VER.pack(version)
+
+
+def pack_input_setup(variables):
+    """
+    Pack the payload of an input setup: the names of the fields.
+
+    Args:
+        variables (List[String]): Names of the fields to send.
+
+    Returns:
+        (Bytes): The packed payload.
+    """
+    return ",".join(variables).encode("utf-8")
+
+
+def pack_output_setup(variables, frequency):
+    """
+    Pack the payload of an output setup: the frequency, then the names of
+    the fields.
+
+    Args:
+        variables (List[String]): Names of the fields to receive.
+        frequency (Float): Frequency of the data packages.
+
+    Returns:
+        (bytearray): The packed payload.
+    """
+    variables_bytes = ",".join(variables).encode("utf-8")
+    payload = bytearray(_DOUBLE.size + len(variables_bytes))
+    _DOUBLE.pack_into(payload, 0, frequency)
+    payload[_DOUBLE.size :] = variables_bytes
+    return payload
+
+
+def check_setup_types(setup, types, result):
+    """
+    Check that the types of a setup answer are the expected ones, and log
+    an error if they are not.
+
+    Args:
+        setup (String): Name of the setup ("input" or "output").
+        types (List[String]): Expected types (not checked if empty).
+        result (DataConfig): Answer of the server to the setup.
+
+    Returns:
+        (Bool): True if the types are consistent, false otherwise.
+    """
+    if len(types) != 0 and result.types != list(types):
+        _log.error(
+            "Data type inconsistency for "
+            + setup
+            + " setup: "
+            + str(types)
+            + " - "
+            + str(result.types)
+        )
+        return False
+    return True
+
+
+def check_controller_version(version):
+    """
+    Log the version of the controller and check that it is supported.
+
+    Args:
+        version (ControlVersion): Version of the controller.
+
+    Returns:
+        (Bool): True if the version is supported, false otherwise.
+    """
+    _log.info(
+        "Controller version: %d.%d.%d.%d",
+        version.major,
+        version.minor,
+        version.bugfix,
+        version.build,
+    )
+    if version.major == 3 and version.minor <= 2 and version.bugfix < 19171:
+        _log.error(
+            "Please upgrade your controller to minimally version 3.2.19171"
+        )
+        return False
+    return True
+
+
+# Commands of the rdte server. They are grouped in Command below, the
+# per-packet code uses the module constants directly.
+RTDE_REQUEST_PROTOCOL_VERSION = 86  # ascii V
+RTDE_GET_URCONTROL_VERSION = 118  # ascii v
+RTDE_TEXT_MESSAGE = 77  # ascii M
+RTDE_DATA_PACKAGE = 85  # ascii U
+RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS = 79  # ascii O
+RTDE_CONTROL_PACKAGE_SETUP_INPUTS = 73  # ascii I
+RTDE_CONTROL_PACKAGE_START = 83  # ascii S
+RTDE_CONTROL_PACKAGE_PAUSE = 80  # ascii P
+
 
 class Command:
     """
@@ -48,14 +216,14 @@ class Command:
     rdte server
     """
 
-    RTDE_REQUEST_PROTOCOL_VERSION = 86  # ascii V
-    RTDE_GET_URCONTROL_VERSION = 118  # ascii v
-    RTDE_TEXT_MESSAGE = 77  # ascii M
-    RTDE_DATA_PACKAGE = 85  # ascii U
-    RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS = 79  # ascii O
-    RTDE_CONTROL_PACKAGE_SETUP_INPUTS = 73  # ascii I
-    RTDE_CONTROL_PACKAGE_START = 83  # ascii S
-    RTDE_CONTROL_PACKAGE_PAUSE = 80  # ascii P
+    RTDE_REQUEST_PROTOCOL_VERSION = RTDE_REQUEST_PROTOCOL_VERSION
+    RTDE_GET_URCONTROL_VERSION = RTDE_GET_URCONTROL_VERSION
+    RTDE_TEXT_MESSAGE = RTDE_TEXT_MESSAGE
+    RTDE_DATA_PACKAGE = RTDE_DATA_PACKAGE
+    RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS = RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS
+    RTDE_CONTROL_PACKAGE_SETUP_INPUTS = RTDE_CONTROL_PACKAGE_SETUP_INPUTS
+    RTDE_CONTROL_PACKAGE_START = RTDE_CONTROL_PACKAGE_START
+    RTDE_CONTROL_PACKAGE_PAUSE = RTDE_CONTROL_PACKAGE_PAUSE
 
 
 class ConnectionState:
@@ -98,7 +266,7 @@ def __unpack_protocol_version_package(payload):
         _log.error("RTDE_REQUEST_PROTOCOL_VERSION: Wrong payload size")
         return None
     # Else, serialize the payload.
-    result = Serialize.ReturnValue.unpack(payload)
+    result = Serialize.unpack_return_value(payload)
     # Return true if it was a success, false otherwise.
     return result.success
 
@@ -117,7 +285,7 @@ def __unpack_urcontrol_version_package(payload):
     if len(payload) != 16:
         _log.error("RTDE_GET_URCONTROL_VERSION: Wrong payload size")
         return None
-    version = Serialize.ControlVersion.unpack(payload)
+    version = Serialize.unpack_control_version(payload)
     return version
 
 
@@ -126,15 +294,21 @@ def __unpack_text_message(payload):
         _log.error("RTDE_TEXT_MESSAGE: No payload")
         return None
     msg = Serialize.Message.unpack(payload)
+    # The source and the message are bytes, decode them to log them
+    text = (
+        msg.source.decode("utf-8", "replace")
+        + ": "
+        + msg.message.decode("utf-8", "replace")
+    )
     if (
         msg.level == Serialize.Message.EXCEPTION_MESSAGE
         or msg.level == Serialize.Message.ERROR_MESSAGE
     ):
-        _log.error(msg.source + ": " + msg.message)
+        _log.error(text)
     elif msg.level == Serialize.Message.WARNING_MESSAGE:
-        _log.warning(msg.source + ": " + msg.message)
+        _log.warning(text)
     elif msg.level == Serialize.Message.INFO_MESSAGE:
-        _log.info(msg.source + ": " + msg.message)
+        _log.info(text)
 
 
 def __unpack_setup_outputs_package(payload):
@@ -157,7 +331,7 @@ def __unpack_start_package(payload):
     if len(payload) != 1:
         _log.error("RTDE_CONTROL_PACKAGE_START: Wrong payload size")
         return None
-    result = Serialize.ReturnValue.unpack(payload)
+    result = Serialize.unpack_return_value(payload)
     return result.success
 
 
@@ -165,7 +339,7 @@ def __unpack_pause_package(payload):
     if len(payload) != 1:
         _log.error("RTDE_CONTROL_PACKAGE_PAUSE: Wrong payload size")
         return None
-    result = Serialize.ReturnValue.unpack(payload)
+    result = Serialize.unpack_return_value(payload)
     return result.success
 
 
@@ -177,26 +351,42 @@ def __unpack_data_package(payload, output_config):
     return output
 
 
-def __list_equals(l1, l2):
+# Unpack method of each package, indexed by its command. The data package
+# unpack method also needs the output configuration.
+_PACKAGE_UNPACKERS = {
+    Command.RTDE_REQUEST_PROTOCOL_VERSION: __unpack_protocol_version_package,
+    Command.RTDE_GET_URCONTROL_VERSION: __unpack_urcontrol_version_package,
+    Command.RTDE_TEXT_MESSAGE: __unpack_text_message,
+    Command.RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS: __unpack_setup_outputs_package,
+    Command.RTDE_CONTROL_PACKAGE_SETUP_INPUTS: __unpack_setup_inputs_package,
+    Command.RTDE_CONTROL_PACKAGE_START: __unpack_start_package,
+    Command.RTDE_CONTROL_PACKAGE_PAUSE: __unpack_pause_package,
+    Command.RTDE_DATA_PACKAGE: __unpack_data_package,
+}
+
+
+def unpack_package(cmd, payload, output_config):
     """
-    Equality operator between two lists, If the lenght is different, the lists
-    are different
+    Unpack a package received from the RDTE server, depending on its
+    command.
 
     Args:
-        (List[Object]): First list.
-        (List[Object]): Second list.
+        cmd (Int): Command of the package.
+        payload (Bytes): Payload of the package.
+        output_config (DataConfig): Output configuration, used by the data
+            packages.
 
     Returns:
-        (Bool): True if the list has the same content, false otherwise
+        (Object): Unpacked data, none if the command is unknown.
     """
-    if len(l1) != len(l2):
-        return False
-    # If any value is different, the lists are different
-    for i in range(len(l1)):
-        if l1[i] != l2[i]:
-            return False
-    # Else, they are the same
-    return True
+    unpacker = _PACKAGE_UNPACKERS.get(cmd)
+    # If it was not a known command, log an error.
+    if unpacker is None:
+        _log.error("Unknown package command: " + str(cmd))
+        return None
+    if cmd == RTDE_DATA_PACKAGE:
+        return unpacker(payload, output_config)
+    return unpacker(payload)
 
 
 class RTDE(object):
@@ -226,9 +416,43 @@ class RTDE(object):
 
         self.__conn_state = ConnectionState.DISCONNECTED
         self.__sock = None
+        self.__selector = None  # readiness notification of the socket
         self.__output_config = None
         self.__input_config = {}
-        self.__buf = b""  # buffer data in binary format
+        self.__buf = bytearray()  # buffer data in binary format
+        self.__buf_pos = 0  # read cursor of the buffer
+        self.__recv_buf = bytearray(_RECV_SIZE)  # socket read buffer
+        self.__recv_mv = memoryview(self.__recv_buf)
+
+    @classmethod
+    def from_socketpair(cls, defaultTimeout=1.0, rtdeProtocolVersion=2):
+        """
+        Create a connection that talks to a local socket instead of a robot,
+        to test or simulate the RDTE server in the same process. No TCP
+        connection is made and the protocol version is not negotiated.
+
+        Args:
+            defaultTimeout:
+            rtdeProtocolVersion:
+
+        Returns:
+            rtde (RTDE): Connection in the "Connected" state.
+            peer (socket.socket): Other end of the connection, playing the
+            role of the server.
+        """
+        rtde = cls(
+            "localhost",
+            port=None,
+            defaultTimeout=defaultTimeout,
+            rtdeProtocolVersion=rtdeProtocolVersion,
+        )
+        sock, peer = socket.socketpair()
+        sock.settimeout(defaultTimeout)
+        rtde.__sock = sock
+        rtde.__selector = selectors.DefaultSelector()
+        rtde.__selector.register(sock, selectors.EVENT_READ)
+        rtde.__conn_state = ConnectionState.CONNECTED
+        return rtde, peer
 
     # Connection method that will connect to the desired socket
     def connect(self):
@@ -241,10 +465,20 @@ class RTDE(object):
             self.__sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.__sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.__sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Detect a dead robot on a stalled send (Linux only)
+            if hasattr(socket, "TCP_USER_TIMEOUT"):
+                self.__sock.setsockopt(
+                    socket.IPPROTO_TCP,
+                    socket.TCP_USER_TIMEOUT,
+                    _USER_TIMEOUT_MS,
+                )
             # Set the timeout
             self.__sock.settimeout(self.defaultTimeout)
             # Connect to the robot on the correct port
             self.__sock.connect((self.hostname, self.port))
+            # Watch the socket for readable data (epoll/kqueue if available)
+            self.__selector = selectors.DefaultSelector()
+            self.__selector.register(self.__sock, selectors.EVENT_READ)
             # Change the state of the connection to "Connected"
             self.__conn_state = ConnectionState.CONNECTED
 
@@ -260,6 +494,10 @@ class RTDE(object):
 
     # Disconnect from the server
     def disconnect(self):
+        # Stop watching the socket
+        if self.__selector:
+            self.__selector.close()
+            self.__selector = None
         # If there is a socket in use
         if self.__sock:
             # Close it and set it to none
@@ -289,29 +527,8 @@ class RTDE(object):
         version = self.__sendAndReceive(cmd)
         # If the result is not none
         if version:
-            # Log the controller version (major, minor, bugfix and build)
-            _log.info(
-                "Controller version: "
-                + str(version.major)
-                + "."
-                + str(version.minor)
-                + "."
-                + str(version.bugfix)
-                + "."
-                + str(version.build)
-            )
-
-            # If the version is not valid
-            if (
-                version.major == 3
-                and version.minor <= 2
-                and version.bugfix < 19171
-            ):
-                # Log an error and exit the method
-                _log.error(
-                    "Please upgrade your controller to minimally "
-                    "version 3.2.19171"
-                )
+            # Log the controller version and exit if it is not valid
+            if not check_controller_version(version):
                 sys.exit()
 
             # Return the major, minor, bugfix and build versions
@@ -331,7 +548,7 @@ class RTDE(object):
         # Set the command to the request protocol version (ascii = v)
         cmd = Command.RTDE_REQUEST_PROTOCOL_VERSION
         # Set the requested protocol version to the one we selected above
-        payload = struct.pack(">H", self.rtdeProtocolVersion)
+        payload = pack_protocol_version(self.rtdeProtocolVersion)
         # Send the command and store its result
         success = self.__sendAndReceive(cmd, payload)
         # Return true if it was successful, false otherwise
@@ -340,15 +557,9 @@ class RTDE(object):
     # Method that will send the input format that we want from the server
     def send_input_setup(self, variables, types=[]):
         cmd = Command.RTDE_CONTROL_PACKAGE_SETUP_INPUTS
-        payload = bytearray(",".join(variables), "utf-8")
+        payload = pack_input_setup(variables)
         result = self.__sendAndReceive(cmd, payload)
-        if len(types) != 0 and not __list_equals(result.types, types):
-            _log.error(
-                "Data type inconsistency for input setup: "
-                + str(types)
-                + " - "
-                + str(result.types)
-            )
+        if not check_setup_types("input", types, result):
             return None
         result.names = variables
         self.__input_config[result.id] = result
@@ -367,16 +578,10 @@ class RTDE(object):
 
         """
         cmd = Command.RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS
-        payload = struct.pack(">d", frequency)
-        payload = payload + (",".join(variables).encode("utf-8"))
+        # Pack the frequency and the variables in a single buffer
+        payload = pack_output_setup(variables, frequency)
         result = self.__sendAndReceive(cmd, payload)
-        if len(types) != 0 and not __list_equals(result.types, types):
-            _log.error(
-                "Data type inconsistency for output setup: "
-                + str(types)
-                + " - "
-                + str(result.types)
-            )
+        if not check_setup_types("output", types, result):
             return False
         result.names = variables
         self.__output_config = result
@@ -430,18 +635,19 @@ class RTDE(object):
             return
 
         # If the configuration id was not found, log an error
-        if input_data.recipe_id not in self.__input_config:
+        if input_data.recipeId not in self.__input_config:
             _log.error(
                 "Input configuration id not found: "
-                + str(input_data.recipe_id)
+                + str(input_data.recipeId)
             )
             return
         # Get the configuration using the recipe ID
-        config = self.__input_config[input_data.recipe_id]
+        config = self.__input_config[input_data.recipeId]
         # Pack and send the package. Return true if it was a success,
-        # false otherwise.
+        # false otherwise. The packed data is copied by __sendall, so the
+        # buffer of the configuration can be reused.
         return self.__sendall(
-            Command.RTDE_DATA_PACKAGE, config.pack(input_data)
+            RTDE_DATA_PACKAGE, config.pack_into(input_data)
         )
 
     def receive(self):
@@ -460,7 +666,7 @@ class RTDE(object):
             return None
 
         # Return the received data
-        return self.__recv(Command.RTDE_DATA_PACKAGE)
+        return self.__recv(RTDE_DATA_PACKAGE)
 
     def send_message(
         self,
@@ -481,12 +687,8 @@ class RTDE(object):
         """
         # Set the command to a text message
         cmd = Command.RTDE_TEXT_MESSAGE
-        # Create the message header
-        fmt = ">B%dsB%dsB" % (len(message), len(source))
-        # Pack the message into a list
-        payload = struct.pack(
-            fmt, len(message), message, len(source), source, data_type
-        )
+        # Pack the message
+        payload = pack_message(message, source, data_type)
         # Send the message. Return true if it's a success, false otherwise.
         return self.__sendall(cmd, payload)
 
@@ -503,25 +705,7 @@ class RTDE(object):
         Returns:
             (Object): Unpacked data
         """
-        if cmd == Command.RTDE_REQUEST_PROTOCOL_VERSION:
-            return __unpack_protocol_version_package(payload)
-        elif cmd == Command.RTDE_GET_URCONTROL_VERSION:
-            return __unpack_urcontrol_version_package(payload)
-        elif cmd == Command.RTDE_TEXT_MESSAGE:
-            return __unpack_text_message(payload)
-        elif cmd == Command.RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS:
-            return __unpack_setup_outputs_package(payload)
-        elif cmd == Command.RTDE_CONTROL_PACKAGE_SETUP_INPUTS:
-            return __unpack_setup_inputs_package(payload)
-        elif cmd == Command.RTDE_CONTROL_PACKAGE_START:
-            return __unpack_start_package(payload)
-        elif cmd == Command.RTDE_CONTROL_PACKAGE_PAUSE:
-            return __unpack_pause_package(payload)
-        elif cmd == Command.RTDE_DATA_PACKAGE:
-            return __unpack_data_package(payload, self.__output_config)
-        # If it was not a known command, log an error.
-        else:
-            _log.error("Unknown package command: " + str(cmd))
+        return unpack_package(cmd, payload, self.__output_config)
 
     def __sendAndReceive(self, cmd, payload=b""):
         """
@@ -553,30 +737,21 @@ class RTDE(object):
         Returns:
             (Bool): True if it succeeded, false otherwise.
         """
-        # Create the message header
-        fmt = ">HB"
-        # Calculate the size of the message
-        size = struct.calcsize(fmt) + len(payload)
-        # Pack the data
-        buf = struct.pack(fmt, size, command) + payload
+        # Pack the header and the data in a single buffer
+        buf = pack_packet(command, payload)
 
         # If there is no socket, log an error
         if self.__sock is None:
             _log.error("Unable to send: not connected to Robot")
             return False
 
-        # Else, wait for the socket to be usable
-        _, writable, _ = select.select(
-            [], [self.__sock], [], self.defaultTimeout
-        )
-
-        # If it is available
-        if len(writable):
-            # Send the message and return true
+        # Else, send the message and return true. The socket timeout is the
+        # default timeout, so a blocked socket raises a timeout.
+        try:
             self.__sock.sendall(buf)
             return True
-        # Else, return false and trigger the disconnected method
-        else:
+        # If it timed out, return false and trigger the disconnected method
+        except (socket.timeout, BlockingIOError):
             self.__trigger_disconnected()
             return False
 
@@ -590,7 +765,7 @@ class RTDE(object):
         # Set the timeout to 0 (we don't want to wait)
         timeout = 0
         # Wait for the socket to be available and store its content
-        readable, _, _ = select.select([self.__sock], [], [], timeout)
+        readable = self.__selector.select(timeout)
         # If it has any data, return true. Else, return false.
         return len(readable) != 0
 
@@ -604,63 +779,100 @@ class RTDE(object):
         Returns:
             data (List[Bytes]): Received data.
         """
+        # If the server is not connected, there is nothing to receive
+        if not self.is_connected():
+            return None
+        # Bind the attributes and methods used in the loop to local names
+        buf = self.__buf
+        recv_mv = self.__recv_mv
+        select_call = self.__selector.select
+        recv_into = self.__sock.recv_into
+        on_packet = self.__on_packet
+        unpack_header = Serialize.HEADER.unpack_from
+        log_info = _log.info
+        timeout = self.defaultTimeout
+        skip_old_packets = command == RTDE_DATA_PACKAGE
+
         # While the server is connected
         while self.is_connected():
-            # Check the availability of the sockets
-            readable, _, xlist = select.select(
-                [self.__sock], [], [self.__sock], self.defaultTimeout
-            )
+            # Check the availability of the socket
+            readable = select_call(timeout)
             # If there is some readable data
             if len(readable):
-                # Receive the data (4096b sized packet)
-                more = self.__sock.recv(4096)
+                # Receive the data in the read buffer
+                size = recv_into(recv_mv, _RECV_SIZE)
                 # If the received data is empty
-                if len(more) == 0:
+                if size == 0:
                     # Disconnect the server
                     self.__trigger_disconnected()
                     return None
-                # Else, add the packet to the data
-                self.__buf = self.__buf + more
 
-            if (
-                len(xlist) or len(readable) == 0
-            ):  # Effectively a timeout of DEFAULT_TIMEOUT seconds
-                _log.info("lost connection with controller")
+            if len(readable) == 0:
+                # Effectively a timeout of DEFAULT_TIMEOUT seconds
+                log_info("lost connection with controller")
                 self.__trigger_disconnected()
                 return None
 
+            # If no data is pending, the packets are read straight from the
+            # read buffer (usual case, a read holds whole packets)
+            if self.__buf_pos == len(buf):
+                del buf[:]
+                self.__buf_pos = 0
+                source, pos, end = recv_mv, 0, size
+            # Else, add the received data to the pending data
+            else:
+                # Drop the data that was already consumed from the buffer
+                if self.__buf_pos >= _BUF_COMPACT_SIZE:
+                    del buf[: self.__buf_pos]
+                    self.__buf_pos = 0
+                buf.extend(recv_mv[:size])
+                source, pos, end = buf, self.__buf_pos, len(buf)
+
+            data = None
+            found = False
             # unpack_from requires a buffer of at least 3 bytes
-            while len(self.__buf) >= 3:
+            while end - pos >= 3:
                 # Attempts to extract a packet
-                packet_header = Serialize.ControlHeader.unpack(self.__buf)
-
-                # If our buffer is bigger or equal to the header of the packet
-                if len(self.__buf) >= packet_header.size:
-                    # Do some packet magic
-                    packet, self.__buf = (
-                        self.__buf[3 : packet_header.size],
-                        self.__buf[packet_header.size :],
-                    )
-                    # Call the "on_packet" method to create the correct
-                    # data strucutre
-                    data = self.__on_packet(packet_header.command, packet)
-                    # Basically, do some RDTE specific stuff
-                    if (
-                        len(self.__buf) >= 3
-                        and command == Command.RTDE_DATA_PACKAGE
-                    ):
-                        next_packet_header = Serialize.ControlHeader.unpack(
-                            self.__buf
-                        )
-                        if next_packet_header.command == command:
-                            _log.info("skipping package(1)")
-                            continue
-                    if packet_header.command == command:
-                        return data
-                    else:
-                        _log.info("skipping package(2)")
+                packet_size, packet_command = unpack_header(source, pos)
+
+                # If our buffer is smaller than the packet, wait for more data
+                if end - pos < packet_size:
+                    break
+
+                start = pos
+                pos += packet_size
+                # Do some packet magic: the packet is a view on the data.
+                # Call the "on_packet" method to create the correct data
+                # strucutre.
+                if source is buf:
+                    # The view is released before the buffer changes
+                    with memoryview(buf) as view, view[
+                        start + 3 : pos
+                    ] as packet:
+                        data = on_packet(packet_command, packet)
                 else:
+                    data = on_packet(packet_command, recv_mv[start + 3 : pos])
+                # Basically, do some RDTE specific stuff
+                if skip_old_packets and end - pos >= 3:
+                    _, next_packet_command = unpack_header(source, pos)
+                    if next_packet_command == command:
+                        log_info("skipping package(1)")
+                        continue
+                if packet_command == command:
+                    found = True
                     break
+                else:
+                    log_info("skipping package(2)")
+
+            # Keep the data that was not consumed for the next packets, the
+            # read buffer is overwritten by the next read
+            if source is buf:
+                self.__buf_pos = pos
+            else:
+                buf.extend(recv_mv[pos:end])
+
+            if found:
+                return data
         return None
 
     def __trigger_disconnected(self):
@@ -38,8 +38,21 @@
 # ------------------------------------------------------------------------------------
 from __future__ import absolute_import, division, print_function
 
+import os  # File modification times
 import sys  # Program execution management
-import xml.etree.ElementTree as ET  # XML file parser library
+
+try:
+    from lxml import etree as ET  # XML file parser library (C parser)
+except ImportError:
+    import xml.etree.ElementTree as ET  # XML file parser library
+
+try:
+    import msgpack  # Binary serializer, used to cache the parsed recipes
+except ImportError:
+    msgpack = None
+
+# Extension of the cache of the parsed recipes, stored next to the XML file
+_CACHE_EXTENSION = ".mpk"
 
 
 # Recipe python object that represents a recipe XML object.
@@ -59,10 +72,12 @@ class Recipe:
         recipe = Recipe()
         # Get the key value of the recipe node
         recipe.key = recipe_node.get("key")
-        # Get all the names in that recipe
-        recipe.names = [f.get("name") for f in recipe_node.findall("field")]
-        # Get all the types in that recipe
-        recipe.types = [f.get("type") for f in recipe_node.findall("field")]
+        # Get all the names and types in that recipe
+        recipe.names = []
+        recipe.types = []
+        for f in recipe_node.findall("field"):
+            recipe.names.append(f.get("name"))
+            recipe.types.append(f.get("type"))
         # Return the Python recipe object
         return recipe
 
@@ -79,11 +94,57 @@ class Recipe:
         return recipe
 
 
+# Cached recipes loader
+#
+# @param-in filename (String): Path of the XML config file
+#
+#
+# @param-out recipes (List[Recipe]): The cached recipes, None if there is no
+# up to date cache (or msgpack is not installed)
+def _load_cache(filename):
+    if msgpack is None:
+        return None
+    cache = filename + _CACHE_EXTENSION
+    try:
+        # The cache is outdated if the XML file was modified after it
+        if os.path.getmtime(cache) < os.path.getmtime(filename):
+            return None
+        with open(cache, "rb") as f:
+            data = msgpack.unpack(f, raw=False)
+        return [
+            Recipe.createRecipe(key, value["n"], value["t"])
+            for key, value in data.items()
+        ]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        # A missing or invalid cache is ignored, the XML file is parsed
+        return None
+
+
+# Cached recipes writer
+#
+# @param-in filename (String): Path of the XML config file
+#
+# @param-in recipes (List[Recipe]): The recipes parsed from the XML file
+def _save_cache(filename, recipes):
+    if msgpack is None:
+        return
+    data = {r.key: {"n": r.names, "t": r.types} for r in recipes}
+    try:
+        with open(filename + _CACHE_EXTENSION, "wb") as f:
+            msgpack.pack(data, f)
+    except OSError:
+        # The cache is optional, the directory may not be writable
+        pass
+
+
 # Config python object that represents the XML file.
 class ConfigFile:
 
     # Constructor (from a file)
-    def __init__(self, filename, recipes=[]):
+    def __init__(self, filename, recipes=None):
+        # No recipes were given (don't share a default list between configs)
+        if recipes is None:
+            recipes = []
         # If the filename is empty and the recipes are empty aswell, raise an exception
         if filename == "" and len(recipes) == 0:
             # If I don't know how to use my own methods, I want them to crash the server so that I stop messing around
@@ -94,18 +155,22 @@ class ConfigFile:
         if filename != "" and len(recipes) == 0:
             # Set the filename
             self.__filename = filename
-            # Create the XML tree of the config file
-            tree = ET.parse(self.__filename)
-            # Find the root of the xml file
-            root = tree.getroot()
-            # Get all the recipes in the config file
-            recipes = [Recipe.parse(r) for r in root.findall("recipe")]
-        # Create a dictionary that will contain all the recipes
-        self.__dictionary = dict()
-        # For all recipes in the XML file
-        for r in recipes:
-            # Store the recipe in the dictionary with the recipe key as the dictionary key
-            self.__dictionary[r.key] = r
+            # Get the recipes from the cache of the config file, if it is up
+            # to date
+            recipes = _load_cache(self.__filename)
+            if recipes is None:
+                # Get all the recipes in the config file, in a single pass
+                recipes = []
+                for _, node in ET.iterparse(
+                    self.__filename, events=("end",)
+                ):
+                    if node.tag == "recipe":
+                        recipes.append(Recipe.parse(node))
+                        # The recipe node is not needed anymore
+                        node.clear()
+                _save_cache(self.__filename, recipes)
+        # Create a dictionary that will contain all the recipes, with the recipe key as the dictionary key
+        self.__dictionary = {r.key: r for r in recipes}
 
     # Recipe getter
     #
@@ -0,0 +1,413 @@
+"""
+Classes: rtde_async.py
+Asyncio version of the RTDE client of Rtde.py, so a single process can
+handle many robot connections. The packets are read with
+StreamReader.readexactly: the 3 bytes header first, then the payload.
+
+uvloop can be used as the event loop by calling install_uvloop() before
+starting the loop.
+
+Example:
+
+    async def main():
+        rtde = AsyncRTDE("10.20.0.194")
+        await rtde.connect()
+        await rtde.send_output_setup(["timestamp"], ["DOUBLE"])
+        await rtde.send_start()
+        state = await rtde.receive()
+        await rtde.disconnect()
+
+    install_uvloop()
+    asyncio.run(main())
+"""
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+import logging
+import socket
+
+import rtde.serialize as Serialize
+from common import CREDENTIALS_DICTIONNARY
+from rtde.Rtde import (
+    LOGNAME,
+    RTDE_DATA_PACKAGE,
+    Command,
+    ConnectionState,
+    RTDEException,
+    check_controller_version,
+    check_setup_types,
+    pack_input_setup,
+    pack_message,
+    pack_output_setup,
+    pack_packet,
+    pack_protocol_version,
+    unpack_package,
+)
+
+_log = logging.getLogger(LOGNAME)
+
+
+def install_uvloop():
+    """
+    Use uvloop as the asyncio event loop, if it is installed.
+
+    Returns:
+        (Bool): True if uvloop is used, false otherwise.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        _log.info("uvloop is not installed, using the default event loop")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+class AsyncRTDE(object):
+    """
+    Constructor
+    AsyncRTDE object that represents an RDTE connection with a robot, all
+    the methods that talk to the robot are coroutines.
+    """
+
+    def __init__(
+        self,
+        hostname,
+        port=CREDENTIALS_DICTIONNARY["RTDE_PORT"],
+        defaultTimeout=1.0,
+        rtdeProtocolVersion=2,
+    ):
+        """
+        Args:
+            hostname (String): Ip address to connect to.
+            port (Int): Port to use (should be 30 004
+            defaultTimeout:
+            rtdeProtocolVersion:
+        """
+        self.hostname = hostname
+        self.port = port
+        self.defaultTimeout = defaultTimeout
+        self.rtdeProtocolVersion = rtdeProtocolVersion
+
+        self.__conn_state = ConnectionState.DISCONNECTED
+        self.__reader = None
+        self.__writer = None
+        self.__output_config = None
+        self.__input_config = {}
+
+    # Connection method that will connect to the robot
+    async def connect(self):
+        # If there is already a connection, exit that function
+        if self.__writer:
+            return
+
+        # Connect to the robot on the correct port. If there is a socket
+        # error or the timeout exceeds, the error is raised.
+        self.__reader, self.__writer = await asyncio.wait_for(
+            asyncio.open_connection(self.hostname, self.port),
+            self.defaultTimeout,
+        )
+        sock = self.__writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Change the state of the connection to "Connected"
+        self.__conn_state = ConnectionState.CONNECTED
+
+        # If we didn't manage to negotiate the protocol version, raise an error
+        if not await self.negotiate_protocol_version():
+            raise RTDEException("Unable to negotiate protocol version")
+
+    # Disconnect from the server
+    async def disconnect(self):
+        # If there is a connection in use
+        if self.__writer:
+            # Close it and set it to none
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.__reader = None
+            self.__writer = None
+        # Set the connection state to "Disconnected"
+        self.__conn_state = ConnectionState.DISCONNECTED
+
+    # Boolean method that will return true if the connection state is
+    # different than "DISCONNECTED"
+    def is_connected(self):
+        return self.__conn_state is not ConnectionState.DISCONNECTED
+
+    async def get_controller_version(self):
+        """
+        Method that will get the version of the robot to which we are connected
+
+        Returns:
+        major (String): Major version of the robot (None if failed to connect)
+        minor (String): Minor version of the robot (None if failed to connect)
+        bugfix (String): Bugfix version of the robot (None if failed to connect
+        build (String): Build version of the robot (None if failed to connect)
+        """
+        cmd = Command.RTDE_GET_URCONTROL_VERSION
+        version = await self.__sendAndReceive(cmd)
+        if version:
+            # Log the controller version and raise if it is not valid
+            if not check_controller_version(version):
+                raise RTDEException("Unsupported controller version")
+            return version.major, version.minor, version.bugfix, version.build
+        return None, None, None, None
+
+    async def negotiate_protocol_version(self):
+        """
+        Method that will try to find a compatible protocol to communicate with
+        the RDTE server
+
+        Returns:
+            success (Object): Object representing the answer from the server.
+            None if it is not a success.
+        """
+        cmd = Command.RTDE_REQUEST_PROTOCOL_VERSION
+        payload = pack_protocol_version(self.rtdeProtocolVersion)
+        return await self.__sendAndReceive(cmd, payload)
+
+    # Method that will send the input format that we want from the server
+    async def send_input_setup(self, variables, types=()):
+        cmd = Command.RTDE_CONTROL_PACKAGE_SETUP_INPUTS
+        payload = pack_input_setup(variables)
+        result = await self.__sendAndReceive(cmd, payload)
+        if result is None or not check_setup_types("input", types, result):
+            return None
+        result.names = variables
+        self.__input_config[result.id] = result
+        return Serialize.DataObject.create_empty(variables, result.id)
+
+    async def send_output_setup(self, variables, types=(), frequency=125):
+        """
+        Method that will send the output format that we want from the server
+
+        Args:
+            variables (List[String]): Names of the fields to receive.
+            types (List[String]): Expected types of the fields (optional).
+            frequency (Float): Frequency of the data packages.
+
+        Returns:
+            (Bool): True if it was a success, false otherwise.
+        """
+        cmd = Command.RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS
+        payload = pack_output_setup(variables, frequency)
+        result = await self.__sendAndReceive(cmd, payload)
+        if result is None or not check_setup_types("output", types, result):
+            return False
+        result.names = variables
+        self.__output_config = result
+        return True
+
+    async def send_start(self):
+        """
+        Method that will synchronize with the RDTE server
+
+        Returns:
+            success (Object): Object representing the answer from the server.
+            None if it is not a success.
+        """
+        cmd = Command.RTDE_CONTROL_PACKAGE_START
+        success = await self.__sendAndReceive(cmd)
+        if success:
+            _log.info("RTDE synchronization started")
+            self.__conn_state = ConnectionState.STARTED
+        else:
+            _log.error("RTDE synchronization failed to start")
+        return success
+
+    # Same as send_start, but to pause the data transfer.
+    async def send_pause(self):
+        cmd = Command.RTDE_CONTROL_PACKAGE_PAUSE
+        success = await self.__sendAndReceive(cmd)
+        if success:
+            _log.info("RTDE synchronization paused")
+            self.__conn_state = ConnectionState.PAUSED
+        else:
+            _log.error("RTDE synchronization failed to pause")
+        return success
+
+    async def send(self, input_data):
+        """
+        Send data to the RDTE server
+
+        Args:
+            input_data (DataObject): Data to send.
+
+        Returns:
+            (Bool): True if it was a success, false otherwise.
+        """
+        if not self.__connection_started_check():
+            return False
+
+        if input_data.recipeId not in self.__input_config:
+            _log.error(
+                "Input configuration id not found: "
+                + str(input_data.recipeId)
+            )
+            return False
+        config = self.__input_config[input_data.recipeId]
+        # The packed data is copied by __send, so the buffer of the
+        # configuration can be reused
+        return await self.__send(
+            RTDE_DATA_PACKAGE, config.pack_into(input_data)
+        )
+
+    async def receive(self):
+        """
+        Receive data from the RDTE server. Unlike RTDE.receive, the data
+        packages are returned in the order they were received.
+
+        Returns:
+            (DataObject): Received data.
+        """
+        if self.__output_config is None:
+            _log.error("Output configuration not initialized")
+            return None
+        if not self.__connection_started_check():
+            return None
+        return await self.__recv(RTDE_DATA_PACKAGE)
+
+    async def send_message(
+        self,
+        message,
+        source="Python Client",
+        data_type=Serialize.Message.INFO_MESSAGE,
+    ):
+        """
+        Sends a text message to the server
+
+        Args:
+            message (String): Text message to send.
+            source (String): Source of the message.
+            data_type (Serialize.Message.type): Type of the data to send.
+
+        Returns:
+            (Bool): True if it was a success, false otherwise.
+        """
+        payload = pack_message(message, source, data_type)
+        return await self.__send(Command.RTDE_TEXT_MESSAGE, payload)
+
+    def __on_packet(self, cmd, payload):
+        """
+        Method that unpacks a packet received from the RDTE server, depending
+        on its command.
+
+        Args:
+            cmd (Int): Command of the packet.
+            payload (Bytes): Payload of the packet.
+
+        Returns:
+            (Object): Unpacked data
+        """
+        return unpack_package(cmd, payload, self.__output_config)
+
+    async def __sendAndReceive(self, cmd, payload=b""):
+        """
+        Method that sends a command with a paylod and returns the server's
+        response
+
+        Args:
+            cmd (Int): Command to send.
+            payload (Bytes): Payload (data) to send.
+
+        Returns:
+            (Object): Server's answer if it exists, none otherwise.
+        """
+        if await self.__send(cmd, payload):
+            return await self.__recv(cmd)
+        return None
+
+    async def __send(self, command, payload=b""):
+        """
+        Method that will send a packet and wait for it to be written.
+
+        Args:
+            command (Int): Command to send.
+            payload (Bytes): Payload (data) to send.
+
+        Returns:
+            (Bool): True if it succeeded, false otherwise.
+        """
+        if self.__writer is None:
+            _log.error("Unable to send: not connected to Robot")
+            return False
+
+        buf = pack_packet(command, payload)
+
+        try:
+            self.__writer.write(buf)
+            await asyncio.wait_for(self.__writer.drain(), self.defaultTimeout)
+            return True
+        except (asyncio.TimeoutError, ConnectionError):
+            await self.__trigger_disconnected()
+            return False
+
+    async def __read_packet(self):
+        """
+        Read a single packet: the header, then the rest of the packet.
+
+        Returns:
+            (Tuple[Int, Bytes]): Command and payload of the packet.
+        """
+        header_struct = Serialize.HEADER
+        header = await self.__reader.readexactly(header_struct.size)
+        size, command = header_struct.unpack(header)
+        payload = await self.__reader.readexactly(size - header_struct.size)
+        return command, payload
+
+    async def __recv(self, command):
+        """
+        Method that will wait for a packet with the given command, the other
+        packets are unpacked and skipped.
+
+        Args:
+            command (Int): Command of the awaited packet.
+
+        Returns:
+            data (Object): Unpacked data of the packet.
+        """
+        while self.is_connected():
+            try:
+                packet_command, payload = await asyncio.wait_for(
+                    self.__read_packet(), self.defaultTimeout
+                )
+            # Effectively a timeout of DEFAULT_TIMEOUT seconds, or the
+            # server closed the connection
+            except (
+                asyncio.TimeoutError,
+                asyncio.IncompleteReadError,
+                ConnectionError,
+            ):
+                _log.info("lost connection with controller")
+                await self.__trigger_disconnected()
+                return None
+
+            data = self.__on_packet(packet_command, payload)
+            if packet_command == command:
+                return data
+            _log.info("skipping package")
+        return None
+
+    async def __trigger_disconnected(self):
+        """
+        Method that will simply disconnect the server and log the information.
+        """
+        _log.info("RTDE disconnected")
+        await self.disconnect()
+
+    def __connection_started_check(self):
+        """
+        Method that will make sure the connection has the state "Started"
+        If the connection is not started, log an error and return false
+
+        Returns:
+            (Bool): True if the connection has the state Started, false otherwise.
+        """
+        if self.__conn_state != ConnectionState.STARTED:
+            _log.error("Cannot receive when RTDE synchronization is inactive")
+            return False
+
+        return True
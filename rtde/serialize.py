@@ -37,8 +37,44 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 from __future__ import absolute_import, division, print_function
 
+import collections  # Named tuples of the control packages
 import struct  # Data structure manager
 
+# Structure of the header of a packet: size (header included) and command
+HEADER = struct.Struct(">HB")
+# Structure of the version of the controller: major, minor, bugfix, build
+_VERSION = struct.Struct(">IIII")
+# Structure of a single unsigned char (ids, lengths, levels and results)
+_UCHAR = struct.Struct(">B")
+
+# Structure keywords of each RTDE data type
+_STRUCT_TYPES = {
+    "INT32": "i",
+    "UINT32": "I",
+    "VECTOR6D": "d" * 6,
+    "VECTOR3D": "d" * 3,
+    "VECTOR6INT32": "i" * 6,
+    "VECTOR6UINT32": "I" * 6,
+    "DOUBLE": "d",
+    "UINT64": "Q",
+    "UINT8": "B",
+    "BOOL": "?",
+}
+
+# Cast of the values of each RTDE data type, starting at an offset
+_UNPACK = {
+    "DOUBLE": lambda d, o: float(d[o]),
+    "UINT32": lambda d, o: int(d[o]),
+    "UINT64": lambda d, o: int(d[o]),
+    "INT32": lambda d, o: int(d[o]),
+    "UINT8": lambda d, o: int(d[o]),
+    "BOOL": lambda d, o: bool(d[o]),
+    "VECTOR6D": lambda d, o: [float(x) for x in d[o : o + 6]],
+    "VECTOR3D": lambda d, o: [float(x) for x in d[o : o + 3]],
+    "VECTOR6UINT32": lambda d, o: [int(x) for x in d[o : o + 6]],
+    "VECTOR6INT32": lambda d, o: [int(x) for x in d[o : o + 6]],
+}
+
 
 def getItemSize(dataType):
     """
@@ -71,81 +107,99 @@ def unpackField(data, offset, dataType):
     Returns:
         (Object): The casted result of the message.
     """
-    # Lets start by getting the size of the object
-    size = getItemSize(dataType)
-    # If it's a vector 6D or 3D
-    if dataType == "VECTOR6D" or dataType == "VECTOR3D":
-        # Return a float list of the data
-        return [float(data[offset + i]) for i in range(size)]
-    # Else, if it's a vector6 uint 32
-    elif dataType == "VECTOR6UINT32":
-        # Return an integer list of the data
-        return [int(data[offset + i]) for i in range(size)]
-    # Else, if it's double
-    elif dataType == "DOUBLE":
-        # Return a float list of the data
-        return float(data[offset])
-    # You get the gist.
-    elif dataType == "UINT32" or dataType == "UINT64":
-        return int(data[offset])
-    elif dataType == "VECTOR6INT32":
-        return [int(data[offset + i]) for i in range(size)]
-    elif dataType == "INT32" or dataType == "UINT8":
-        return int(data[offset])
-    elif dataType == "BOOL":
-        return bool(data[offset])
-    # If no data was found, the data type was not recognized
-    raise ValueError("unpackField: unknown data type: " + dataType)
-
-
-class ControlHeader(object):
+    # Find the cast of the data type and apply it to the data
+    try:
+        unpack = _UNPACK[dataType]
+    except KeyError:
+        # If no cast was found, the data type was not recognized
+        raise ValueError("unpackField: unknown data type: " + dataType)
+    return unpack(data, offset)
+
+
+class ControlHeader(collections.namedtuple("ControlHeader", "size command")):
     """
     Found strings in the message that represent a header
     """
 
-    __slots__ = ["command", "size"]
+    __slots__ = ()
 
     @staticmethod
-    def unpack(buf):
+    def unpack(buf, offset=0):
         """
-        Unpack method of the header
+        Unpack method of the header, kept for compatibility (see
+        unpack_control_header)
 
         Args:
             buf (List[bytes]): List containing the data.
+            offset (Int): Position of the header in the data.
 
         Returns:
             (ControlHeader): Control header object representation of the data.
         """
-        rmd = ControlHeader()
-        (rmd.size, rmd.command) = struct.unpack_from(">HB", buf)
-        return rmd
+        return unpack_control_header(buf, offset)
 
 
-class ControlVersion(object):
+class ControlVersion(
+    collections.namedtuple("ControlVersion", "major minor bugfix build")
+):
     """
     The next two classes are a copy of the header object, but specific to
     their object representation.
     """
 
-    __slots__ = ["major", "minor", "bugfix", "build"]
+    __slots__ = ()
 
     @staticmethod
     def unpack(buf):
-        rmd = ControlVersion()
-        (rmd.major, rmd.minor, rmd.bugfix, rmd.build) = struct.unpack_from(
-            ">IIII", buf
-        )
-        return rmd
+        return unpack_control_version(buf)
 
 
-class ReturnValue(object):
-    __slots__ = ["success"]
+class ReturnValue(collections.namedtuple("ReturnValue", "success")):
+    __slots__ = ()
 
     @staticmethod
     def unpack(buf):
-        rmd = ReturnValue()
-        rmd.success = bool(struct.unpack_from(">B", buf)[0])
-        return rmd
+        return unpack_return_value(buf)
+
+
+def unpack_control_header(buf, offset=0):
+    """
+    Unpack a header
+
+    Args:
+        buf (List[bytes]): List containing the data.
+        offset (Int): Position of the header in the data.
+
+    Returns:
+        (ControlHeader): Size (header included) and command of the packet.
+    """
+    return ControlHeader._make(HEADER.unpack_from(buf, offset))
+
+
+def unpack_control_version(buf):
+    """
+    Unpack the version of the controller
+
+    Args:
+        buf (List[bytes]): List containing the data.
+
+    Returns:
+        (ControlVersion): Major, minor, bugfix and build of the version.
+    """
+    return ControlVersion._make(_VERSION.unpack_from(buf))
+
+
+def unpack_return_value(buf):
+    """
+    Unpack the result of a request
+
+    Args:
+        buf (List[bytes]): List containing the data.
+
+    Returns:
+        (ReturnValue): True if the request succeeded, false otherwise.
+    """
+    return ReturnValue(bool(_UCHAR.unpack_from(buf)[0]))
 
 
 # Message object
@@ -170,41 +224,48 @@ class Message(object):
         Returns:
             (Message): Message object representation of the data.
         """
+        # The lengths and the level are single bytes, they are read by
+        # indexing the buffer, which gives integers
+        if not isinstance(buf, (bytes, bytearray, memoryview)):
+            buf = bytes(buf)
         # Create a message object
         rmd = Message()
-        # Set the offset to 0
-        offset = 0
-        # Find the length of the message
-        msgLength = struct.unpack_from(">B", buf, offset)[0]
-
-        # Add 1 to the offset to read the message data
-        offset = offset + 1
-        # The message is the part of the array between the offset and
-        # the end of the message
-        rmd.message = buf[offset : offset + msgLength]
-
-        # Update the offset to be at the end of the message
-        offset = offset + msgLength
-        # Get the length of the source of the message
-        srcLength = struct.unpack_from(">B", buf, offset)[0]
-
-        # Update the offset to read the source data
-        offset = offset + 1
-        # The source is the part of the array between the offset
-        # and the end of the source
-        rmd.source = buf[offset : offset + srcLength]
-
-        # Update the offset to be at the end of the source
-        offset = offset + srcLength
-        # The level is the remaining part of the buffer
-        rmd.level = struct.unpack_from(">B", buf, offset)[0]
+        # Read the data through a view, so that only the message and the
+        # source are copied
+        with memoryview(buf) as view:
+            # Find the length of the message
+            msgLength = view[0]
+            # The message is the part of the array after its length
+            offset = 1
+            rmd.message = bytes(view[offset : offset + msgLength])
+
+            # Update the offset to be at the end of the message
+            offset = offset + msgLength
+            # Get the length of the source of the message
+            srcLength = view[offset]
+
+            # Update the offset to read the source data
+            offset = offset + 1
+            # The source is the part of the array between the offset
+            # and the end of the source
+            rmd.source = bytes(view[offset : offset + srcLength])
+
+            # Update the offset to be at the end of the source
+            offset = offset + srcLength
+            # The level is the remaining part of the buffer
+            rmd.level = view[offset]
 
         return rmd
 
 
-class DataObject(object):
-    # Set the id of the recipe to none
-    recipeId = None
+class BaseDataObject(object):
+    """
+    Methods shared by all the data objects. The base has no slots of its own,
+    so that the data objects of the recipes (see DataConfig) only store their
+    fields in slots, without an instance dictionary.
+    """
+
+    __slots__ = ()
 
     def pack(self, names, types):
         """
@@ -233,23 +294,28 @@ class DataObject(object):
         for i in range(len(names)):
             # If the names have not already been initialized,
             # there has been an error
-            if self.__dict__[names[i]] is None:
+            if getattr(self, names[i]) is None:
                 raise ValueError("Uninitialized parameter: " + names[i])
 
             # If the data is a vector
             if types[i].startswith("VECTOR"):
                 # Extend the list with the names
-                packedData.extend(self.__dict__[names[i]])
+                packedData.extend(getattr(self, names[i]))
             # Else, its a single value
             else:
                 # So append it
-                packedData.append(self.__dict__[names[i]])
+                packedData.append(getattr(self, names[i]))
 
         # Return the resulting list
         return packedData
 
+
+class DataObject(BaseDataObject):
+    # Set the id of the recipe to none
+    recipeId = None
+
     @staticmethod
-    def unpack(data, names, types):
+    def unpack(data, names, types, widths=None):
         """
         A method that will unpack a message
 
@@ -257,6 +323,8 @@ class DataObject(object):
             data (List[Bytes]): List of bytes to unpack
             names (List[String]): List of names of the recipe.
             types (List[String]): List of types of the recipe.
+            widths (List[Int]): Sizes of the types (see getItemSize),
+            computed from the types if not given.
 
         Returns:
             obj (DataObject): Unpacked data.
@@ -264,18 +332,20 @@ class DataObject(object):
         # If the names and types don't have the same length, it doesn't match
         if len(names) != len(types):
             raise ValueError("List sizes are not identical.")
+        if widths is None:
+            widths = [getItemSize(dataType) for dataType in types]
         # Create a data object to store the unpacked data
         obj = DataObject()
-        # Set the offset to 0
-        offset = 0
         # The recipeId of the object should be at index 0
         obj.recipeId = data[0]
+        # Set the offset to 1, the fields start after the recipeId
+        offset = 1
         # For all the names of the recipe
         for i in range(len(names)):
             # Fetch the name in the data array with the unpack field method
-            obj.__dict__[names[i]] = unpackField(data[1:], offset, types[i])
+            obj.__dict__[names[i]] = unpackField(data, offset, types[i])
             # Update the offset to be equal to the length of the fetched data
-            offset += getItemSize(types[i])
+            offset += widths[i]
         # Return the resulting data object
         return obj
 
@@ -296,7 +366,7 @@ class DataObject(object):
         # For all the desired names
         for i in range(len(names)):
             # Set them to none
-            obj.__dict__[names[i]] = None
+            setattr(obj, names[i], None)
         # Set the desired recipe ID to the desired one
         obj.recipeId = recipeId
         # Return the empty data object
@@ -310,7 +380,18 @@ class DataConfig(object):
     """
 
     # Strings found int he data object representing a configuration object
-    __slots__ = ["id", "names", "types", "fmt"]
+    __slots__ = [
+        "id",
+        "names",
+        "types",
+        "fmt",
+        "_struct",
+        "_widths",
+        "_accessors",
+        "_scratch",
+        "_layout",
+        "_cls",
+    ]
 
     @staticmethod
     def unpack_recipe(buf):
@@ -326,58 +407,104 @@ class DataConfig(object):
         # Create a data configuration object
         recipe = DataConfig()
         # The ID should be the first index of the array
-        recipe.id = struct.unpack_from(">B", buf)[0]
+        recipe.id = _UCHAR.unpack_from(buf)[0]
         # All the types should be separated by commas, so the list of
         # types should be easily obtainable by splitting the array with
         # that char, starting at index 1.
-        recipe.types = buf.decode("utf-8")[1:].split(",")
-        # String that will hold a keyword representing the data types.
-        recipe.fmt = ">B"
+        with memoryview(buf) as view:
+            recipe.types = str(view[1:], "utf-8").split(",")
+        # Keywords representing the data types, starting with the id
+        fmt = [">B"]
         # For all types
         for i in recipe.types:
-            # If it's int32, add the keyword i.
-            if i == "INT32":
-                recipe.fmt += "i"
-            # Etc.
-            elif i == "UINT32":
-                recipe.fmt += "I"
-            elif i == "VECTOR6D":
-                recipe.fmt += "d" * 6
-            elif i == "VECTOR3D":
-                recipe.fmt += "d" * 3
-            elif i == "VECTOR6INT32":
-                recipe.fmt += "i" * 6
-            elif i == "VECTOR6UINT32":
-                recipe.fmt += "I" * 6
-            elif i == "DOUBLE":
-                recipe.fmt += "d"
-            elif i == "UINT64":
-                recipe.fmt += "Q"
-            elif i == "UINT8":
-                recipe.fmt += "B"
-            elif i == "BOOL":
-                recipe.fmt += "?"
-            # If the type is "IN_USE", that parameter is already in use!
-            elif i == "IN_USE":
-                raise ValueError("An input parameter is already in use.")
-            # If we have found an unkown data type, raise an error.
-            else:
+            keyword = _STRUCT_TYPES.get(i)
+            if keyword is None:
+                # If the type is "IN_USE", that parameter is already in use!
+                if i == "IN_USE":
+                    raise ValueError("An input parameter is already in use.")
+                # If we have found an unkown data type, raise an error.
                 raise ValueError("Unknown data type: " + i)
+            fmt.append(keyword)
+        # String that will hold the keywords representing the data types.
+        recipe.fmt = "".join(fmt)
+        # Compile the structure once, it is used for every package
+        recipe._struct = struct.Struct(recipe.fmt)
+        # Number of values of each type in the structure
+        recipe._widths = [getItemSize(i) for i in recipe.types]
+        # The layout of the fields needs the names, it is built on the first
+        # unpack (see __build_layout)
+        recipe._layout = None
+        # The (name, is vector) list of the fields, built on the first pack
+        recipe._accessors = None
+        # Buffer reused by each pack_into
+        recipe._scratch = bytearray(recipe._struct.size)
 
         # Return the created recipe
         return recipe
 
     def pack(self, state):
         """
-        Dark magic shenanigans that were created by UR
+        Dark magic shenanigans that were created by UR. The values are read
+        from the fields of the data object and packed in a single call.
+
+        Args:
+            state (BaseDataObject): Data object holding the recipe fields.
+
+        Returns:
+            (bytes): The packed data.
+        """
+        return self._struct.pack(*self.__values(state))
+
+    def pack_into(self, state):
+        """
+        Method that will pack a data object like pack, in a buffer of the
+        recipe that is reused by every call. The buffer is overwritten by the
+        next pack_into, it must be sent (or copied) before.
+
+        Args:
+            state (BaseDataObject): Data object holding the recipe fields.
+
+        Returns:
+            (bytearray): The packed data.
+        """
+        self._struct.pack_into(self._scratch, 0, *self.__values(state))
+        return self._scratch
+
+    def __values(self, state):
+        """
+        Method that will read the values to pack from the fields of a data
+        object, the vectors are flattened.
 
         Args:
-            state:
+            state (BaseDataObject): Data object holding the recipe fields.
 
         Returns:
+            values (List[Object]): Values of the recipe id and the fields.
         """
-        state_pack = state.pack(self.names, self.types)
-        return struct.pack(self.fmt, *state_pack)
+        if self._accessors is None:
+            # If the names and types don't have the same length, it doesn't
+            # match
+            if len(self.names) != len(self.types):
+                raise ValueError("List sizes are not identical.")
+            self._accessors = [
+                (name, dataType.startswith("VECTOR"))
+                for name, dataType in zip(self.names, self.types)
+            ]
+        values = []
+        # Add the recipe id, if it is set
+        if state.recipeId is not None:
+            values.append(state.recipeId)
+        for name, is_vector in self._accessors:
+            value = getattr(state, name)
+            # If the field has not been initialized, there has been an error
+            if value is None:
+                raise ValueError("Uninitialized parameter: " + name)
+            # The vectors are flattened in the values
+            if is_vector:
+                values.extend(value)
+            else:
+                values.append(value)
+        return values
 
     def unpack(self, data):
         """
@@ -387,9 +514,41 @@ class DataConfig(object):
             data (List[Bytes]): List of the data.
 
         Returns:
-            (DataObject): The unpacked data.
+            (BaseDataObject): The unpacked data.
         """
-        # Unpack the data with the structure library
-        li = struct.unpack_from(self.fmt, data)
-        # Unpack it with our DataObject implementation and return the result
-        return DataObject.unpack(li, self.names, self.types)
+        if self._layout is None:
+            self.__build_layout()
+        # Unpack the data with the structure library, the values are already
+        # of the correct type
+        li = self._struct.unpack_from(data)
+        # Create a data object to store the unpacked data
+        obj = self._cls()
+        # The recipeId of the object should be at index 0
+        obj.recipeId = li[0]
+        offset = 1
+        # Name the values, the vectors are grouped in lists
+        for name, width in self._layout:
+            if width == 1:
+                setattr(obj, name, li[offset])
+            else:
+                setattr(obj, name, list(li[offset : offset + width]))
+            offset += width
+        # Return the resulting data object
+        return obj
+
+    def __build_layout(self):
+        """
+        Method that will build the (name, width) list of the fields of the
+        recipe and the data object class of the recipe.
+        """
+        # If the names and types don't have the same length, it doesn't match
+        if len(self.names) != len(self.types):
+            raise ValueError("List sizes are not identical.")
+        self._layout = list(zip(self.names, self._widths))
+        # Data objects of the recipe store their fields in slots, which are
+        # smaller and faster than the instance dictionary
+        self._cls = type(
+            "DataObject" + str(self.id),
+            (BaseDataObject,),
+            {"__slots__": ["recipeId"] + list(self.names)},
+        )
@@ -7,20 +7,23 @@ class XMLRPCClient:
     def __init__(self):
         self.server = "127.0.0.1"
         self.port = 60000
-        self.proxy = xmlrpc.client.ServerProxy(f"http://{self.server}:{str(self.port)}/")
+        self.url = f"http://{self.server}:{self.port}/"
+        self.proxy = xmlrpc.client.ServerProxy(self.url)
 
 
     def call_dynamic_plugins(self):
-        originatingIP = self.proxy.getClientIp()
-
-        result = self.proxy.CallHandler("PARA_GRIPPER" ,"setServerOff", 10, "Allo", 55.86)
-        print(result)
-        result = self.proxy.CallHandler("PARA_GRIPPER" ,"setServerOn", 10, "Allo")
-        print(result)
-        result = self.proxy.CallHandler("VACUUM_VOLTS", "MeasureMaxVolts")
-        print(result)
-        result = self.proxy.CallHandler("VACUUM_VOLTS", "LowerAvgLoad", 10, 2.33)
-        print(result)
+        # The calls are sent to the server in a single request (the server
+        # must support system.multicall)
+        multicall = xmlrpc.client.MultiCall(self.proxy)
+        multicall.getClientIp()
+        multicall.CallHandler("PARA_GRIPPER" ,"setServerOff", 10, "Allo", 55.86)
+        multicall.CallHandler("PARA_GRIPPER" ,"setServerOn", 10, "Allo")
+        multicall.CallHandler("VACUUM_VOLTS", "MeasureMaxVolts")
+        multicall.CallHandler("VACUUM_VOLTS", "LowerAvgLoad", 10, 2.33)
+        originatingIP, *results = multicall()
+
+        for result in results:
+            print(result)
 
 
 
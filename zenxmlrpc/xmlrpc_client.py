@@ -7,21 +7,14 @@ class XMLRPCClient:
         # self.server = "10.20.22.68"
         self.server = "127.0.0.1"
         self.port = 60000
+        # Reused proxy, its transport keeps the HTTP connection alive
+        self.url = f"http://{self.server}:{self.port}/"
+        self.proxy = xmlrpc.client.ServerProxy(self.url)
 
     def call_server(self):
-        proxy = xmlrpc.client.ServerProxy(f"http://{self.server}:{str(self.port)}/")
+        result = self.proxy.getClientIp()
 
-        result = proxy.getClientIp()
-
-        proxy.call_handler2("disp" ,"function", ['PAram1', 2, 'param3'], "param4")
-        print(result)
-
-    def call_server(self):
-        proxy = xmlrpc.client.ServerProxy(f"http://{self.server}:{str(self.port)}/")
-
-        result = proxy.getClientIp()
-
-        proxy.call_handler2("disp" ,"function", ['PAram1', 2, 'param3'], "param4")
+        self.proxy.call_handler2("disp" ,"function", ['PAram1', 2, 'param3'], "param4")
         print(result)
 
 